@@ -1,11 +1,23 @@
-import json
+import asyncio
+import contextlib
+import hashlib
 import re
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+from datetime import date, datetime, timedelta, timezone
+from typing import AsyncIterator, Optional
 
+import httpx
+import orjson
 import structlog
-from openai import AsyncOpenAI
-
+from openai import APIConnectionError, AsyncOpenAI, RateLimitError
+from pydantic import BaseModel
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from bot.ai_cache import TTLCache
 from bot.models import MedalRecord, StepReport, TelegramMessage, TelegramUser
 
 logger = structlog.get_logger()
@@ -44,6 +56,35 @@ Answer in the same language as the question (usually Russian).
 Be concise and precise. If the provided data is insufficient to answer, say so clearly.\
 """
 
+_AI_ERROR = "Произошла ошибка при обращении к ИИ."
+
+# ---------------------------------------------------------------------------
+# Fast-path classifier — obvious questions skip the LLM round-trip
+# ---------------------------------------------------------------------------
+
+_NICK_RE = re.compile(r"#(\w+)")
+_WORD_RE = re.compile(r"\w+")
+
+_GREETINGS = frozenset({
+    "привет", "здравствуй", "здравствуйте", "спасибо", "пока",
+    "hi", "hello", "hey", "thanks",
+})
+_ALL_WORDS = frozenset({"все", "всех", "всем", "all", "everyone"})
+# Word prefixes that make a question ambiguous between steps and medals
+_STEP_PREFIXES = ("шаг", "step", "топ", "top")
+_MEDAL_PREFIXES = ("медал", "medal", "золот", "серебр", "бронз", "gold", "silver", "bronze")
+
+
+# ---------------------------------------------------------------------------
+# Projections — only the fields the prompt builders read
+# ---------------------------------------------------------------------------
+
+
+class _MsgProj(BaseModel):
+    date: datetime
+    username: Optional[str] = None
+    text: str
+
 
 # ---------------------------------------------------------------------------
 # Service
@@ -51,20 +92,52 @@ Be concise and precise. If the provided data is insufficient to answer, say so c
 
 
 class AIService:
-    def __init__(self, api_key: str, model: str = "gpt-4o-mini") -> None:
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-4o-mini",
+        max_parallel: int = 4,
+    ) -> None:
+        # One pooled HTTP/2 client for every OpenAI call over the bot's lifetime
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+        )
+        # tenacity (_complete/_open_stream) is the only retry layer, so the SDK's
+        # own backoff never sleeps while a semaphore slot is held
+        self.client = AsyncOpenAI(api_key=api_key, http_client=self._http, max_retries=0)
         self.model = model
+        # Bounds in-flight OpenAI calls across all concurrent questions
+        self._sem = asyncio.Semaphore(max_parallel)
+        self._cache = TTLCache(maxsize=512, ttl=3600)
+        # Final answers; keyed on the fetched context too, so fresh data misses
+        self._answer_cache = TTLCache(maxsize=256, ttl=300)
+        self._sys_date: Optional[date] = None
+        self._sys_msg: Optional[str] = None
 
     async def handle_question(
         self,
         question: str,
         asking_user_id: Optional[int],
         asking_nickname: Optional[str] = None,
-    ) -> str:
+    ) -> AsyncIterator[str]:
         logger.info("Handling question", question)
 
-        """Two-step flow: classify required context, then answer with it."""
-        decision = await self._classify_context(question, asking_nickname)
+        """Two-step flow: classify required context, then stream the answer as text deltas."""
+        prefetched: dict[str, str] = {}
+        history_task: Optional[asyncio.Task] = None
+        decision = _fast_classify(question)
+        if decision is None:
+            if "#" not in question:
+                # No #nick in the question — message history is the likeliest
+                # bucket, so start fetching it while the classifier runs.
+                history_task = asyncio.create_task(self._fetch_message_history())
+            try:
+                decision = await self._classify_context(question, asking_nickname)
+            except Exception as exc:
+                logger.error("Context classification failed", error=str(exc))
+                decision = {"contexts": ["none"], "nickname": None}
 
         logger.info(".. decision made", decision=decision)
 
@@ -72,6 +145,16 @@ class AIService:
         raw = decision.get("contexts") or decision.get("context") or "none"
         contexts: list[str] = raw if isinstance(raw, list) else [raw]
 
+        # Only wait for the speculative fetch if the classifier picked it
+        if history_task is not None:
+            if "message_history" in contexts:
+                try:
+                    prefetched["message_history"] = await history_task
+                except Exception as exc:
+                    logger.warning("Speculative history fetch failed", error=str(exc))
+            else:
+                history_task.cancel()
+
         nickname: Optional[str] = decision.get("nickname") or None
 
         # When any user-specific context is requested but no name was extracted,
@@ -86,21 +169,90 @@ class AIService:
 
         logger.info(".. using contexts and nickname", contexts=contexts, nickname=nickname)
 
-        context_text = await self._fetch_context(contexts, nickname)
-        return await self._answer(question, context_text)
+        context_text = await self._fetch_context(contexts, nickname, prefetched)
+
+        ckey = hashlib.sha256(
+            question.strip().lower().encode()
+            + b"|" + hashlib.sha256(context_text.encode()).digest()
+        ).hexdigest()
+        if (hit := await self._answer_cache.get(ckey)) is not None:
+            logger.info(".. answer cache hit", stats=self._answer_cache.stats)
+            yield hit
+            return
+
+        parts: list[str] = []
+        try:
+            # aclosing: if our caller abandons us, _answer's finally (semaphore
+            # release, stream close) runs now rather than at GC finalization
+            async with contextlib.aclosing(self._answer(question, context_text)) as deltas:
+                async for delta in deltas:
+                    parts.append(delta)
+                    yield delta
+        except Exception as exc:
+            logger.error("LLM answer step failed", error=str(exc))
+            # Mark a cut-off answer so it isn't mistaken for a complete one
+            yield f"\n\n{_AI_ERROR}" if parts else _AI_ERROR
+            return
+
+        answer = "".join(parts).strip()
+        if answer:
+            await self._answer_cache.set(ckey, answer)
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self._http.aclose()
+
+    @retry(
+        retry=retry_if_exception_type((RateLimitError, APIConnectionError)),
+        wait=wait_exponential(multiplier=1, min=1, max=20),
+        stop=stop_after_attempt(4),
+        reraise=True,
+    )
+    async def _complete(self, **kwargs):
+        """Issue one chat completion, throttled by the service-wide semaphore."""
+        async with self._sem:
+            return await self.client.chat.completions.create(**kwargs)
+
+    @retry(
+        retry=retry_if_exception_type((RateLimitError, APIConnectionError)),
+        wait=wait_exponential(multiplier=1, min=1, max=20),
+        stop=stop_after_attempt(4),
+        reraise=True,
+    )
+    async def _open_stream(self, **kwargs):
+        """Open a streamed completion holding a semaphore slot.
+
+        On success the slot stays acquired and the caller must release it once
+        the stream is consumed; on failure it is released before the retry wait.
+        """
+        await self._sem.acquire()
+        try:
+            return await self.client.chat.completions.create(stream=True, **kwargs)
+        except BaseException:
+            self._sem.release()
+            raise
 
     # ------------------------------------------------------------------
     # Step 1 — classify
     # ------------------------------------------------------------------
 
     async def _classify_context(self, question: str, asking_nickname: Optional[str] = None) -> dict:
+        # The classifier runs at temperature 0, so identical inputs give identical
+        # routing decisions — cache them to skip the OpenAI round-trip.
+        key = hashlib.sha256(
+            f"{asking_nickname or ''}|{question.strip().lower()}".encode()
+        ).hexdigest()
+        if (hit := await self._cache.get(key)) is not None:
+            logger.info(".. classifier cache hit", stats=self._cache.stats)
+            return hit
+
         if asking_nickname:
             hint = f'\nThe person asking is #{asking_nickname}. When they refer to themselves (e.g. "я", "мои", "I", "me"), treat it as referring to #{asking_nickname}.'
         else:
             hint = ""
         system = _CLASSIFIER_SYSTEM.format(asking_hint=hint)
         try:
-            response = await self.client.chat.completions.create(
+            response = await self._complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system},
@@ -109,76 +261,100 @@ class AIService:
                 response_format={"type": "json_object"},
                 temperature=0,
             )
-            return json.loads(response.choices[0].message.content)
+            decision = orjson.loads(response.choices[0].message.content)
+        except orjson.JSONDecodeError as exc:
+            logger.error("Classifier returned invalid JSON", error=str(exc))
+            return {"contexts": ["none"], "nickname": None}
         except Exception as exc:
             logger.error("Context classification failed", error=str(exc))
             return {"contexts": ["none"], "nickname": None}
 
+        await self._cache.set(key, decision)
+        return decision
+
     # ------------------------------------------------------------------
     # Step 1.5 — fetch context data from MongoDB
     # ------------------------------------------------------------------
 
-    async def _fetch_context(self, contexts: list[str], nickname: Optional[str]) -> str:
-        parts: list[str] = []
-        for ctx in contexts:
-            if ctx == "none":
-                continue
-            try:
-                if ctx == "message_history":
-                    parts.append(await self._fetch_message_history())
-                elif ctx in ("user_steps", "all_steps"):
-                    parts.append(await self._fetch_step_reports(
-                        nickname if ctx == "user_steps" else None
-                    ))
-                elif ctx in ("user_medals", "all_medals"):
-                    parts.append(await self._fetch_medal_records(
-                        nickname if ctx == "user_medals" else None
-                    ))
-            except Exception as exc:
-                logger.error("Failed to fetch context", context=ctx, error=str(exc))
-        return "\n\n".join(parts)
+    async def _fetch_context(
+        self,
+        contexts: list[str],
+        nickname: Optional[str],
+        prefetched: Optional[dict[str, str]] = None,
+    ) -> str:
+        """Fetch every requested context concurrently, preserving their order."""
+        prefetched = prefetched or {}
+        results = await asyncio.gather(
+            *(self._fetch_one(ctx, nickname, prefetched) for ctx in contexts)
+        )
+        return "\n\n".join(r for r in results if r)
+
+    async def _fetch_one(
+        self, ctx: str, nickname: Optional[str], prefetched: dict[str, str]
+    ) -> Optional[str]:
+        if ctx in prefetched:
+            return prefetched[ctx]
+        try:
+            if ctx == "message_history":
+                return await self._fetch_message_history()
+            if ctx in ("user_steps", "all_steps"):
+                return await self._fetch_step_reports(
+                    nickname if ctx == "user_steps" else None
+                )
+            if ctx in ("user_medals", "all_medals"):
+                return await self._fetch_medal_records(
+                    nickname if ctx == "user_medals" else None
+                )
+        except Exception as exc:
+            logger.error("Failed to fetch context", context=ctx, error=str(exc))
+        return None
 
     async def _fetch_message_history(self) -> str:
-        msgs = await TelegramMessage.find().sort("-date").limit(200).to_list()
+        # Newest 200 via the `date` index, projected to the three fields we print
+        msgs = (
+            await TelegramMessage.find()
+            .sort("-date")
+            .limit(200)
+            .project(_MsgProj)
+            .to_list()
+        )
         if not msgs:
             return "No messages in the last 24 hours."
-        lines = [
-            f"[{m.date.strftime('%d.%m %H:%M')}] @{m.username or '?'}: {m.text}"
+        logger.info("Fetched message history", lines_count=len(msgs))
+        # Int formatting of date attributes is much cheaper than strftime per row
+        return "Channel messages (last 24 h):\n" + "\n".join(
+            f"[{m.date.day:02d}.{m.date.month:02d} {m.date.hour:02d}:{m.date.minute:02d}]"
+            f" @{m.username or '?'}: {m.text}"
             for m in reversed(msgs)
-        ]
-        logger.info("Fetched message history", lines_count=len(lines))
-        return "Channel messages (last 24 h):\n" + "\n".join(lines)
+        )
 
     async def _fetch_step_reports(self, nickname: Optional[str]) -> str:
         since = datetime.now(timezone.utc) - timedelta(days=30)
+        match: dict = {"date": {"$gte": since}}
         if nickname:
-            reports = (
-                await StepReport.find(
-                    StepReport.date >= since,
-                    {"nickname": {"$regex": f"^{re.escape(nickname)}$", "$options": "i"}},
-                )
-                .sort("date")
-                .to_list()
-            )
-            logger.info(f"Fetched steps for {nickname}", reports_count=len(reports))
+            match["nickname"] = {"$regex": f"^{re.escape(nickname)}$", "$options": "i"}
             header = f"Step reports for #{nickname} (last 30 days):"
             empty_msg = f"No step data found for #{nickname} in the last 30 days."
         else:
-            reports = (
-                await StepReport.find(StepReport.date >= since)
-                .sort("date")
-                .to_list()
-            )
-            logger.info("Fetched steps for all users", reports_count=len(reports))
             header = "Step reports for all users (last 30 days):"
             empty_msg = "No step data in the last 30 days."
 
-        if not reports:
+        # Format each line server-side so no StepReport documents are hydrated
+        cursor = await StepReport.get_pymongo_collection().aggregate([
+            {"$match": match},
+            {"$sort": {"date": 1}},
+            {"$project": {"_id": 0, "line": {"$concat": [
+                {"$dateToString": {"format": "%d.%m.%Y", "date": "$date"}},
+                ": #", "$nickname", " — ", {"$toString": "$steps"}, " steps",
+            ]}}},
+        ])
+        lines: list[str] = []
+        async for doc in cursor:
+            lines.append(doc["line"])
+        logger.info("Fetched steps", nickname=nickname, reports_count=len(lines))
+
+        if not lines:
             return empty_msg
-        lines = [
-            f"{r.date.strftime('%d.%m.%Y')}: #{r.nickname} — {r.steps:,} steps"
-            for r in reports
-        ]
         return header + "\n" + "\n".join(lines)
 
     async def _fetch_medal_records(self, nickname: Optional[str]) -> str:
@@ -207,34 +383,74 @@ class AIService:
 
         if not records:
             return empty_msg
-        lines = [
-            f"{r.date.strftime('%d.%m.%Y')}: #{r.nickname} — {r.medal.value}"
+        return header + "\n" + "\n".join(
+            f"{r.date.day:02d}.{r.date.month:02d}.{r.date.year}: #{r.nickname} — {r.medal.value}"
             for r in records
-        ]
-        return header + "\n" + "\n".join(lines)
+        )
 
     # ------------------------------------------------------------------
     # Step 2 — answer
     # ------------------------------------------------------------------
 
-    async def _answer(self, question: str, context: str) -> str:
-        now = datetime.now(timezone.utc)
-        today = now.strftime("%d.%m.%Y")
-        yesterday = (now - timedelta(days=1)).strftime("%d.%m.%Y")
-        system = _ANSWER_SYSTEM.format(today=today, yesterday=yesterday)
+    def _answer_system(self) -> str:
+        """Return the answer system prompt, re-rendered only when the UTC date changes."""
+        today = datetime.now(timezone.utc).date()
+        if today != self._sys_date:
+            self._sys_msg = _ANSWER_SYSTEM.format(
+                today=today.strftime("%d.%m.%Y"),
+                yesterday=(today - timedelta(days=1)).strftime("%d.%m.%Y"),
+            )
+            self._sys_date = today
+        return self._sys_msg
+
+    async def _answer(self, question: str, context: str) -> AsyncIterator[str]:
+        """Stream the completion as text deltas; errors propagate to the caller."""
+        system = self._answer_system()
         user_content = (
             f"{question}\n\n<data>\n{context}\n</data>" if context else question
         )
+        stream = await self._open_stream(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user_content},
+            ],
+            temperature=0.3,
+        )
+        # The slot is held until the last token, so max_parallel bounds whole
+        # generations; closing also frees the connection on an early exit.
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system},
-                    {"role": "user", "content": user_content},
-                ],
-                temperature=0.3,
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as exc:
-            logger.error("LLM answer step failed", error=str(exc))
-            return "Произошла ошибка при обращении к ИИ."
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        finally:
+            try:
+                await stream.close()
+            finally:
+                self._sem.release()
+
+
+def _fast_classify(question: str) -> Optional[dict]:
+    """Route obvious questions without the LLM; return None when unsure.
+
+    - greetings only                → ["none"]
+    - mentions #nick (steps only)   → ["user_steps"] for that nickname
+    - asks about everyone's steps   → ["all_steps"]
+    """
+    words = _WORD_RE.findall(question.lower())
+    if not words:
+        return None
+    if all(w in _GREETINGS for w in words):
+        return {"contexts": ["none"], "nickname": None}
+
+    if any(w.startswith(_MEDAL_PREFIXES) for w in words):
+        return None
+
+    nicks = _NICK_RE.findall(question)
+    if len(nicks) == 1:
+        return {"contexts": ["user_steps"], "nickname": nicks[0].lower()}
+    if not nicks and any(w in _ALL_WORDS for w in words) \
+            and any(w.startswith(_STEP_PREFIXES) for w in words):
+        return {"contexts": ["all_steps"], "nickname": None}
+    return None
@@ -0,0 +1,46 @@
+"""In-process LRU cache with per-entry TTL for AIService results."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class TTLCache:
+    """Async-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    Entries are stored as ``(value, expires_at)`` tuples in an OrderedDict;
+    the most recently used key is kept at the end, and the oldest is evicted
+    once ``maxsize`` is exceeded.
+    """
+
+    def __init__(self, maxsize: int = 512, ttl: float = 3600.0) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._data: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        self._lock = asyncio.Lock()
+        self.stats: dict[str, int] = {"hits": 0, "misses": 0}
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for *key*, or None on miss/expiry."""
+        async with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store *value* under *key*, evicting the least recently used entry if full."""
+        async with self._lock:
+            self._data[key] = (value, time.monotonic() + self._ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
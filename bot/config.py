@@ -1,4 +1,5 @@
-from typing import List, Optional
+from functools import cached_property
+from typing import FrozenSet, List, Optional
 
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -30,6 +31,19 @@ class Settings(BaseSettings):
             return [int(x.strip()) for x in v.split(",") if x.strip()]
         return v
 
+    @cached_property
+    def allowed_chat_id_set(self) -> FrozenSet[int]:
+        """``allowed_chat_ids`` as a frozenset for O(1) per-message lookups."""
+        return frozenset(self.allowed_chat_ids)
+
+    # Webhook mode (default is long polling). Telegram requires HTTPS, so the
+    # bot listens on plain HTTP behind a TLS-terminating reverse proxy.
+    use_webhook: bool = False
+    webhook_url: Optional[str] = None  # public base URL, e.g. https://bot.example.com
+    webhook_path: str = "telegram"
+    webhook_port: int = 8443
+    webhook_secret_token: Optional[str] = None
+
     # MongoDB Configuration
     mongodb_uri: str
 
@@ -42,6 +56,7 @@ class Settings(BaseSettings):
     # OpenAI
     openai_api_key: Optional[str] = None
     openai_model: str = "gpt-4o-mini"
+    openai_max_parallel: int = 4
 
     # Logging
     log_level: str = "INFO"
@@ -1,7 +1,13 @@
-"""Unified MongoDB connection manager for bot and worker."""
+"""Unified MongoDB connection manager for bot and worker.
+
+The process holds exactly one ``AsyncMongoClient`` (and so one connection
+pool), created by ``MongoDB.connect``. Code that needs raw driver access —
+the medals job, utilities — goes through Beanie's collection accessors
+rather than constructing its own client.
+"""
 
 import structlog
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import AsyncMongoClient
 from beanie import init_beanie
 from typing import List, Type
 from beanie import Document
@@ -12,7 +18,7 @@ logger = structlog.get_logger()
 class MongoDB:
     """MongoDB connection manager."""
 
-    client: AsyncIOMotorClient = None
+    client: AsyncMongoClient = None
     database = None
 
     @classmethod
@@ -30,10 +36,22 @@ class MongoDB:
             database_name: Database name
             document_models: List of Document model classes to initialize
         """
+        if cls.client is not None:
+            logger.warning("MongoDB already connected, reusing existing client")
+            return
+
         try:
             logger.info("Connecting to MongoDB...",
                         uri=mongodb_uri.split("@")[-1])
-            cls.client = AsyncIOMotorClient(mongodb_uri)
+            cls.client = AsyncMongoClient(
+                mongodb_uri,
+                maxPoolSize=20,
+                minPoolSize=5,
+                maxIdleTimeMS=30_000,
+                waitQueueTimeoutMS=10_000,
+                serverSelectionTimeoutMS=5_000,
+                retryWrites=True,
+            )
             cls.database = cls.client[database_name]
 
             # Initialize Beanie with provided document models
@@ -43,10 +61,25 @@ class MongoDB:
                     document_models=document_models,
                 )
 
+            # Establish the connection eagerly so the first handler isn't slow
+            await cls.client.admin.command("ping")
+
+            for model in document_models or []:
+                collection = model.get_pymongo_collection()
+                indexes = await collection.index_information()
+                logger.info("Collection indexes",
+                            collection=collection.name,
+                            indexes={name: info["key"] for name, info in indexes.items()})
+
             logger.info("Successfully connected to MongoDB",
                         database=database_name)
         except Exception as e:
             logger.error("Failed to connect to MongoDB", error=str(e))
+            # Don't leave a half-initialised client for the guard above to reuse
+            if cls.client is not None:
+                await cls.client.close()
+            cls.client = None
+            cls.database = None
             raise
 
     @classmethod
@@ -54,5 +87,7 @@ class MongoDB:
         """Close MongoDB connection."""
         if cls.client:
             logger.info("Closing MongoDB connection...")
-            cls.client.close()
+            await cls.client.close()
+            cls.client = None
+            cls.database = None
             logger.info("MongoDB connection closed")
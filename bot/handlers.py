@@ -1,17 +1,21 @@
 import asyncio
+import contextlib
+import functools
 import random
 import re
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 import structlog
-from beanie.operators import Set
+from pymongo import ReturnDocument
 from telegram import ReactionTypeEmoji, Update
+from telegram.error import RetryAfter
 from telegram.ext import ContextTypes
 
+from bot import msg_batcher
 from bot.config import settings
 from bot.medals import assign_medals_job
-from bot.models import TelegramMessage, TelegramUser, StepReport, MedalRecord, MEDAL_SYMBOLS
+from bot.models import TelegramUser, StepReport, MedalRecord, MEDAL_SYMBOLS
 from bot.parser import parse_report
 
 logger = structlog.get_logger()
@@ -19,6 +23,18 @@ logger = structlog.get_logger()
 # Vladivostok is permanently UTC+10 (no DST since 2014)
 _VLADIVOSTOK_TZ = timezone(timedelta(hours=10))
 
+# Streamed AI answers: Telegram allows roughly one message edit per second per chat
+_STREAM_PLACEHOLDER = "…"
+_STREAM_EDIT_INTERVAL = 1.0
+
+_ALNUM_RE = re.compile(r"[A-Za-zА-Яа-яЁё0-9]")
+
+_REPORT_TAGS = ("#отчет", "#отчёт")
+_AI_INSULT_RE = re.compile(r"ии[\s\-]*(говно|какашка|гамно)")
+_AI_COMPLIMENT_RE = re.compile(
+    r"ии[\s\-]*(лапочка|умничка|молодец|красавчик|красавица|умник|супер|класс)"
+)
+
 
 # ---------------------------------------------------------------------------
 # Public handler — registered in main.py
@@ -32,50 +48,45 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         logger.info("Empty message")
         return
 
-    text = message.text or message.caption
-    if not text:
-        logger.info("Empty message text")
-        return
-
-    logger.info("handle_message", text=text)
-
     # Allowlist check — silently drop anything not from a configured chat.
-    if settings.allowed_chat_ids and message.chat_id not in settings.allowed_chat_ids:
+    allowed = settings.allowed_chat_id_set
+    if allowed and message.chat_id not in allowed:
         logger.warning(
             "Message from unauthorized chat ignored",
             chat_id=message.chat_id,
         )
         return
 
-    # Save to MongoDB (TTL index on `date` ensures 24 h auto-expiry)
-    try:
-        await TelegramMessage(
-            message_id=message.message_id,
-            chat_id=message.chat_id,
-            user_id=message.from_user.id if message.from_user else None,
-            username=message.from_user.username if message.from_user else None,
-            text=text,
-            date=message.date,
-        ).insert()
-    except Exception as exc:
-        logger.error("Failed to save message to MongoDB", error=str(exc))
+    text = message.text or message.caption
+    if not text:
+        logger.info("Empty message text")
+        return
+
+    logger.info("handle_message", text=text)
+
+    # Queue for a batched write (TTL index on `date` ensures 24 h auto-expiry)
+    # so routing below doesn't wait on MongoDB.
+    msg_batcher.enqueue({
+        "message_id": message.message_id,
+        "chat_id": message.chat_id,
+        "user_id": message.from_user.id if message.from_user else None,
+        "username": message.from_user.username if message.from_user else None,
+        "text": text,
+        "date": message.date,
+    })
 
     text_lower = text.lower()
-    if "#отчет" in text_lower or "#отчёт" in text_lower:
+    if any(tag in text_lower for tag in _REPORT_TAGS):
         await _handle_report(update, context, text)
-    elif re.search(r'ии[\s\-]*(говно|какашка|гамно)', text_lower):
+    elif _AI_INSULT_RE.search(text_lower):
         await _react_ai_insult(update, context)
-    elif re.search(r'ии[\s\-]*(лапочка|умничка|молодец|красавчик|красавица|умник|супер|класс)', text_lower):
+    elif _AI_COMPLIMENT_RE.search(text_lower):
         await _react_ai_compliment(update, context)
-    elif _is_bot_mentioned(message, context.bot.username):
-        if "today-top" in text_lower:
-            await _handle_today_top(update, context)
-        elif "month-top" in text_lower:
-            await _handle_month_top(update, context)
-        elif "totals" in text_lower:
-            await _handle_totals(update, context)
-        elif "generate-medals" in text_lower:
-            await _handle_generate_medals(update, context)
+    elif _is_bot_mentioned(message, _bot_username_lower(context), text):
+        for keyword, command in _CMDS:
+            if keyword in text_lower:
+                await command(update, context)
+                break
         else:
             await _handle_ai_query(update, context)
 
@@ -97,18 +108,20 @@ async def _resolve_nickname(user_id: Optional[int], parsed_nickname: Optional[st
     """
     if parsed_nickname:
         if user_id is not None:
-            user = await TelegramUser.find_one(TelegramUser.user_id == user_id)
-            if user is None:
-                await TelegramUser(user_id=user_id, nickname=parsed_nickname).insert()
-            elif user.nickname != parsed_nickname:
-                user.nickname = parsed_nickname
-                await user.save()
+            # Single round-trip create-or-update instead of find + insert/save
+            await TelegramUser.get_pymongo_collection().update_one(
+                {"user_id": user_id},
+                {"$set": {"nickname": parsed_nickname}},
+                upsert=True,
+            )
         return parsed_nickname
 
     if user_id is not None:
-        user = await TelegramUser.find_one(TelegramUser.user_id == user_id)
+        user = await TelegramUser.get_pymongo_collection().find_one(
+            {"user_id": user_id}, {"nickname": 1, "_id": 0}
+        )
         if user:
-            return user.nickname
+            return user["nickname"]
 
     return None
 
@@ -118,14 +131,22 @@ async def _resolve_nickname(user_id: Optional[int], parsed_nickname: Optional[st
 # ---------------------------------------------------------------------------
 
 
-def _is_bot_mentioned(message, bot_username: str) -> bool:
-    """Return True if the bot is explicitly @mentioned in the message."""
-    text = message.text or message.caption or ""
+def _bot_username_lower(context: ContextTypes.DEFAULT_TYPE) -> str:
+    """Return the bot's username lowercased once at startup (see main.py)."""
+    return context.bot_data.get("bot_username_lower") or context.bot.username.lower()
+
+
+def _is_bot_mentioned(message, bot_username_lower: str, text: str) -> bool:
+    """Return True if the bot is explicitly @mentioned in the message.
+
+    Entities are sliced from the original *text*: lowercasing can change the
+    string's length ("İ" → "i̇") and shift the entity offsets.
+    """
     entities = message.entities or message.caption_entities or []
     for entity in entities:
         if entity.type == "mention":
             mention = text[entity.offset: entity.offset + entity.length]
-            if mention.lstrip("@").lower() == bot_username.lower():
+            if mention.lstrip("@").lower() == bot_username_lower:
                 return True
     return False
 
@@ -144,12 +165,13 @@ async def _handle_today_top(update: Update, context: ContextTypes.DEFAULT_TYPE)
     end = start + timedelta(days=1)
 
     try:
-        reports = (
-            await StepReport.find(StepReport.date >= start, StepReport.date < end)
-            .sort("-steps")
-            .limit(5)
-            .to_list()
-        )
+        cursor = await StepReport.get_pymongo_collection().aggregate([
+            {"$match": {"date": {"$gte": start, "$lt": end}}},
+            {"$sort": {"steps": -1}},
+            {"$limit": 5},
+            {"$project": {"_id": 0, "nickname": 1, "steps": 1}},
+        ])
+        reports = await cursor.to_list(length=5)
     except Exception as exc:
         logger.error("Failed to query today-top", error=str(exc))
         return
@@ -159,7 +181,7 @@ async def _handle_today_top(update: Update, context: ContextTypes.DEFAULT_TYPE)
     else:
         lines = ["Топ-5 за сегодня:"]
         for i, r in enumerate(reports, 1):
-            lines.append(f"{i}. #{r.nickname} — {r.steps:,} шагов")
+            lines.append(f"{i}. #{r['nickname']} — {r['steps']:,} шагов")
         text = "\n".join(lines)
 
     await context.bot.send_message(chat_id=message.chat_id, text=text)
@@ -226,14 +248,28 @@ async def _handle_generate_medals(update: Update, context: ContextTypes.DEFAULT_
     await assign_medals_job(context)
 
 
+# Mention commands, checked in order against the lowercased message text
+_CMDS = (
+    ("today-top", _handle_today_top),
+    ("month-top", _handle_month_top),
+    ("totals", _handle_totals),
+    ("generate-medals", _handle_generate_medals),
+)
+
+
 # ---------------------------------------------------------------------------
 # Internal — AI query
 # ---------------------------------------------------------------------------
 
 
+@functools.lru_cache(maxsize=4)
+def _mention_strip_re(bot_username: str) -> re.Pattern:
+    return re.compile(rf"@{re.escape(bot_username)}\s*", re.IGNORECASE)
+
+
 def _strip_bot_mention(text: str, bot_username: str) -> str:
     """Remove @BotName from the message text so the LLM sees only the question."""
-    return re.sub(rf"@{re.escape(bot_username)}\s*", "", text, flags=re.IGNORECASE).strip()
+    return _mention_strip_re(bot_username).sub("", text).strip()
 
 
 async def _handle_ai_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -252,6 +288,14 @@ async def _handle_ai_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     question = _strip_bot_mention(message.text, context.bot.username)
     if not question:
         return
+    # "?", emoji and similar accidental mentions aren't worth two LLM calls
+    if len(question) < 3 or not _ALNUM_RE.search(question):
+        await context.bot.send_message(
+            chat_id=message.chat_id,
+            text="Задайте вопрос, например: 'топ за сегодня'",
+            reply_to_message_id=message.message_id,
+        )
+        return
 
     user_id = message.from_user.id if message.from_user else None
 
@@ -265,17 +309,88 @@ async def _handle_ai_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -
             logger.warning(
                 "Failed to resolve asking user nickname", error=str(exc))
 
+    # Reply with a placeholder, then edit it as answer tokens stream in
+    reply = await context.bot.send_message(
+        chat_id=message.chat_id,
+        text=_STREAM_PLACEHOLDER,
+        reply_to_message_id=message.message_id,
+    )
+    loop = asyncio.get_running_loop()
+    buffer = ""
+    sent = _STREAM_PLACEHOLDER
+    last_edit = loop.time()
     try:
-        answer = await ai_service.handle_question(question, user_id, asking_nickname)
+        async with contextlib.aclosing(
+            ai_service.handle_question(question, user_id, asking_nickname)
+        ) as deltas:
+            async for delta in deltas:
+                buffer += delta
+                if loop.time() - last_edit >= _STREAM_EDIT_INTERVAL:
+                    sent = await _edit_reply(context, reply, buffer.strip(), sent)
+                    last_edit = loop.time()
     except Exception as exc:
         logger.error("AI query failed", error=str(exc))
-        answer = "Произошла ошибка при обращении к ИИ."
+        buffer += "\n\nПроизошла ошибка при обращении к ИИ."
 
-    await context.bot.send_message(
-        chat_id=message.chat_id,
-        text=answer,
-        reply_to_message_id=message.message_id,
-    )
+    answer = buffer.strip()
+    await _finish_reply(context, message, reply, answer, sent)
+
+
+async def _finish_reply(
+    context: ContextTypes.DEFAULT_TYPE, message, reply, text: str, sent: str
+) -> None:
+    """Make the final edit, which is the only one carrying the whole answer.
+
+    Flood control after the streaming edits is waited out once; if the edit
+    still fails, the answer is sent as a new reply instead.
+    """
+    if text == sent:
+        return
+    for attempt in range(2):
+        try:
+            await context.bot.edit_message_text(
+                chat_id=reply.chat_id,
+                message_id=reply.message_id,
+                text=text,
+            )
+            return
+        except RetryAfter as exc:
+            if attempt:
+                logger.warning("Final answer edit still rate limited", error=str(exc))
+                break
+            delay = exc.retry_after
+            if isinstance(delay, timedelta):
+                delay = delay.total_seconds()
+            logger.warning("Final answer edit rate limited, retrying", retry_after=delay)
+            await asyncio.sleep(delay)
+        except Exception as exc:
+            logger.warning("Failed to edit final answer", error=str(exc))
+            break
+
+    try:
+        await context.bot.send_message(
+            chat_id=message.chat_id,
+            text=text,
+            reply_to_message_id=message.message_id,
+        )
+    except Exception as exc:
+        logger.error("Failed to send answer", error=str(exc))
+
+
+async def _edit_reply(context: ContextTypes.DEFAULT_TYPE, reply, text: str, sent: str) -> str:
+    """Edit *reply* to *text* unless unchanged; return the text now shown."""
+    if not text or text == sent:
+        return sent
+    try:
+        await context.bot.edit_message_text(
+            chat_id=reply.chat_id,
+            message_id=reply.message_id,
+            text=text,
+        )
+    except Exception as exc:
+        logger.warning("Failed to edit streamed answer", error=str(exc))
+        return sent
+    return text
 
 
 # ---------------------------------------------------------------------------
@@ -391,15 +506,36 @@ async def _handle_report(update: Update, context: ContextTypes.DEFAULT_TYPE, tex
     logger.info("Recording steps", nickname=nickname,
                 report_date=report_date, steps=report.steps)
 
-    try:
-        await asyncio.to_thread(
+    # Sheets and MongoDB writes run concurrently. The MongoDB upsert returns
+    # the previous steps so it can be rolled back if the sheet write fails.
+    report_filter = {"nickname": nickname, "date": report_date}
+    sheets_result, mongo_result = await asyncio.gather(
+        asyncio.to_thread(
             sheets_service.write_steps,
             nickname,
             report_date,
             report.steps,
-        )
-    except Exception as exc:
-        logger.error("Failed to write to Google Sheets", error=str(exc))
+        ),
+        StepReport.get_pymongo_collection().find_one_and_update(
+            report_filter,
+            {"$set": {"steps": report.steps}, "$setOnInsert": {"user_id": user_id}},
+            projection={"steps": 1, "_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        ),
+        return_exceptions=True,
+    )
+
+    mongo_saved = not isinstance(mongo_result, BaseException)
+    if not mongo_saved:
+        logger.error("Failed to save report to MongoDB", error=str(mongo_result))
+
+    # The sheet is the source of truth for participants — only its failure is user-visible
+    if isinstance(sheets_result, BaseException):
+        logger.error("Failed to write to Google Sheets", error=str(sheets_result))
+        # Medals, tops and AI answers read MongoDB; keep it in line with the sheet
+        if mongo_saved:
+            await _rollback_step_report(report_filter, mongo_result)
         await context.bot.send_message(
             chat_id=chat_id,
             text="Ошибка сохранения данных",
@@ -407,24 +543,23 @@ async def _handle_report(update: Update, context: ContextTypes.DEFAULT_TYPE, tex
         )
         return
 
-    try:
-        await StepReport.find_one(
-            StepReport.nickname == nickname,
-            StepReport.date == report_date,
-        ).upsert(
-            Set({StepReport.steps: report.steps}),
-            on_insert=StepReport(
-                user_id=user_id,
-                nickname=nickname,
-                date=report_date,
-                steps=report.steps,
-            ),
-        )
-    except Exception as exc:
-        logger.error("Failed to save report to MongoDB", error=str(exc))
-
     await context.bot.send_message(
         chat_id=chat_id,
         text=f"#{nickname} - принято",
         reply_to_message_id=message_id,
     )
+
+
+async def _rollback_step_report(report_filter: dict, previous: Optional[dict]) -> None:
+    """Undo a StepReport upsert: delete the new document or restore the old steps."""
+    collection = StepReport.get_pymongo_collection()
+    try:
+        if previous is None:
+            await collection.delete_one(report_filter)
+        else:
+            await collection.update_one(
+                report_filter, {"$set": {"steps": previous["steps"]}}
+            )
+    except Exception as exc:
+        logger.error("Failed to roll back step report",
+                     report=report_filter, error=str(exc))
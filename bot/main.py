@@ -3,6 +3,7 @@ from datetime import time, timezone
 import structlog
 from telegram.ext import Application, MessageHandler, filters
 
+from bot import msg_batcher
 from bot.ai import AIService
 from bot.config import settings
 from bot.database import MongoDB
@@ -25,6 +26,9 @@ async def startup(application: Application) -> None:
         mongodb_uri=settings.mongodb_uri,
         document_models=[TelegramMessage, TelegramUser, StepReport, MedalRecord],
     )
+    msg_batcher.start()
+
+    application.bot_data["bot_username_lower"] = application.bot.username.lower()
 
     application.bot_data["sheets_service"] = SheetsService(
         credentials_path=settings.google_credentials_path,
@@ -36,6 +40,7 @@ async def startup(application: Application) -> None:
         application.bot_data["ai_service"] = AIService(
             api_key=settings.openai_api_key,
             model=settings.openai_model,
+            max_parallel=settings.openai_max_parallel,
         )
         logger.info("AIService initialised", model=settings.openai_model)
     else:
@@ -52,6 +57,10 @@ async def startup(application: Application) -> None:
 async def shutdown(application: Application) -> None:
     """Cleanup connections and services."""
     logger.info("Shutting down EasyGo Bot...")
+    await msg_batcher.stop()
+    ai_service = application.bot_data.get("ai_service")
+    if ai_service is not None:
+        await ai_service.aclose()
     await MongoDB.close()
     logger.info("Shutdown complete")
 
@@ -70,10 +79,36 @@ def main() -> None:
         MessageHandler((filters.TEXT | filters.CAPTION) & ~filters.COMMAND, handle_message)
     )
 
+    allowed_updates = ["message", "channel_post"]
+
+    if settings.use_webhook:
+        if not settings.webhook_url:
+            raise ValueError("WEBHOOK_URL must be set when USE_WEBHOOK is enabled")
+        webhook_url = f"{settings.webhook_url.rstrip('/')}/{settings.webhook_path}"
+        logger.info("Starting webhook...", url=webhook_url, port=settings.webhook_port)
+
+        # Telegram pushes updates to us; TLS is terminated by the reverse proxy
+        application.run_webhook(
+            listen="0.0.0.0",
+            port=settings.webhook_port,
+            url_path=settings.webhook_path,
+            webhook_url=webhook_url,
+            secret_token=settings.webhook_secret_token,
+            bootstrap_retries=-1,
+            allowed_updates=allowed_updates,
+            drop_pending_updates=True,
+        )
+        return
+
     logger.info("Starting polling...")
 
+    # Long polling: Telegram holds each getUpdates open for up to 50 s and
+    # returns as soon as an update arrives; the next poll starts immediately.
     application.run_polling(
-        allowed_updates=["message", "channel_post"],
+        timeout=50,
+        poll_interval=0.0,
+        bootstrap_retries=-1,
+        allowed_updates=allowed_updates,
         drop_pending_updates=True,
     )
 
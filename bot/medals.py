@@ -3,8 +3,11 @@
 import asyncio
 from collections import defaultdict
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 import structlog
+from pydantic import BaseModel
+from pymongo import UpdateOne
 from telegram.ext import ContextTypes
 
 from bot.config import settings
@@ -15,6 +18,14 @@ logger = structlog.get_logger()
 _MSK = timezone(timedelta(hours=3))
 
 
+class _StepReportLite(BaseModel):
+    """Projection of StepReport with only the fields the medal job reads."""
+
+    user_id: Optional[int] = None
+    nickname: str
+    steps: int
+
+
 async def assign_medals_job(context: ContextTypes.DEFAULT_TYPE) -> None:
     """Award gold 🥇, silver 🥈, bronze 🥉 for the previous MSK calendar day.
 
@@ -30,75 +41,47 @@ async def assign_medals_job(context: ContextTypes.DEFAULT_TYPE) -> None:
 
     logger.info("Running medal assignment", date=str(yesterday))
 
+    medal_order = [MedalType.GOLD, MedalType.SILVER, MedalType.BRONZE]
+
+    # Dense ranking over the descending stream: assign medal by distinct step
+    # rank and stop reading at the 4th distinct value
+    ranked: list[tuple[_StepReportLite, MedalType]] = []
+    rank = 0
+    prev_steps: int | None = None
     try:
-        reports = await StepReport.find(
-            StepReport.date >= day_start,
-            StepReport.date < day_end,
-        ).to_list()
+        # The (date, steps desc) index serves the date range; with a range on
+        # the leading key MongoDB still sorts the day's reports in memory.
+        # Breaking out early only saves transferring the remaining batches.
+        async for report in (
+            StepReport.find(
+                StepReport.date >= day_start,
+                StepReport.date < day_end,
+            )
+            .sort(-StepReport.steps)
+            .project(_StepReportLite)
+        ):
+            if report.steps != prev_steps:
+                rank += 1
+                prev_steps = report.steps
+            if rank > 3:
+                break
+            ranked.append((report, medal_order[rank - 1]))
     except Exception as exc:
         logger.error("Failed to query step reports for medals", error=str(exc))
         return
 
-    if not reports:
+    if not ranked:
         logger.info("No step reports found, skipping medals",
                     date=str(yesterday))
         return
 
-    # Dense ranking: sort descending, assign medal by distinct step rank
-    reports.sort(key=lambda r: r.steps, reverse=True)
-    medal_order = [MedalType.GOLD, MedalType.SILVER, MedalType.BRONZE]
-
-    ranked: list[tuple[StepReport, MedalType]] = []
-    rank = 0
-    prev_steps: int | None = None
-    for report in reports:
-        if report.steps != prev_steps:
-            rank += 1
-            prev_steps = report.steps
-        if rank > 3:
-            break
-        ranked.append((report, medal_order[rank - 1]))
-
     sheets_service = context.bot_data.get("sheets_service")
 
-    for report, medal in ranked:
-        symbol = MEDAL_SYMBOLS[medal]
-
-        # Upsert medal record in MongoDB
-        try:
-            existing = await MedalRecord.find_one(
-                MedalRecord.nickname == report.nickname,
-                MedalRecord.date == day_start,
-            )
-            if existing is None:
-                await MedalRecord(
-                    user_id=report.user_id,
-                    nickname=report.nickname,
-                    date=day_start,
-                    medal=medal,
-                ).insert()
-            else:
-                existing.medal = medal
-                await existing.save()
-        except Exception as exc:
-            logger.error("Failed to save medal record",
-                         nickname=report.nickname, error=str(exc))
-
-        # Write medal symbol into the steps sheet cell
-        if sheets_service:
-            try:
-                await asyncio.to_thread(
-                    sheets_service.write_medal,
-                    report.nickname,
-                    day_start,
-                    symbol,
-                )
-            except Exception as exc:
-                logger.error(
-                    "Failed to write medal to sheet",
-                    nickname=report.nickname,
-                    error=str(exc),
-                )
+    # MongoDB upserts and sheet writes are independent — run them concurrently
+    await asyncio.gather(
+        _save_medal_records(ranked, day_start),
+        _write_medal_cells(sheets_service, ranked, day_start),
+    )
 
     logger.info(
         "Medal assignment complete",
@@ -110,14 +93,54 @@ async def assign_medals_job(context: ContextTypes.DEFAULT_TYPE) -> None:
         await _post_medal_report(context, ranked, yesterday)
 
 
+async def _save_medal_records(
+    ranked: list[tuple[_StepReportLite, MedalType]],
+    day_start: datetime,
+) -> None:
+    """Upsert all medal records for the day in one bulk_write.
+
+    The unique (date, nickname) index makes re-runs idempotent.
+    """
+    ops = [
+        UpdateOne(
+            {"nickname": report.nickname, "date": day_start},
+            {"$set": {"user_id": report.user_id, "medal": medal.value}},
+            upsert=True,
+        )
+        for report, medal in ranked
+    ]
+    try:
+        await MedalRecord.get_pymongo_collection().bulk_write(ops, ordered=False)
+    except Exception as exc:
+        logger.error("Failed to save medal records",
+                     date=str(day_start.date()), error=str(exc))
+
+
+async def _write_medal_cells(
+    sheets_service,
+    ranked: list[tuple[_StepReportLite, MedalType]],
+    day_start: datetime,
+) -> None:
+    """Write every medal symbol into the steps sheet with one batched call."""
+    if sheets_service is None:
+        return
+    entries = [
+        (report.nickname, day_start, MEDAL_SYMBOLS[medal]) for report, medal in ranked
+    ]
+    try:
+        await asyncio.to_thread(sheets_service.write_medals_bulk, entries)
+    except Exception as exc:
+        logger.error("Failed to write medals to sheet", error=str(exc))
+
+
 async def _post_medal_report(
     context: ContextTypes.DEFAULT_TYPE,
-    ranked: list[tuple[StepReport, MedalType]],
+    ranked: list[tuple[_StepReportLite, MedalType]],
     date,
 ) -> None:
     """Send a medal summary message to REPORT_CHANNEL_ID."""
     # Group winners by medal type to handle ties on one line
-    by_medal: dict[MedalType, list[StepReport]] = defaultdict(list)
+    by_medal: dict[MedalType, list[_StepReportLite]] = defaultdict(list)
     for report, medal in ranked:
         by_medal[medal].append(report)
 
@@ -127,10 +150,10 @@ async def _post_medal_report(
             continue
         winners = by_medal[medal]
         symbol = MEDAL_SYMBOLS[medal]
-        nicks = ", ".join(
+        nicks = ", ".join([
             f"#{r.nickname}" if not r.nickname.startswith("#") else r.nickname
             for r in winners
-        )
+        ])
         steps = f"{winners[0].steps:,}".replace(",", " ")
         lines.append(f"{symbol} {nicks} — {steps} шагов")
 
@@ -3,7 +3,7 @@ from enum import Enum
 from typing import Optional
 
 from beanie import Document
-from pymongo import ASCENDING, IndexModel
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 
 class TelegramMessage(Document):
@@ -50,7 +50,11 @@ class StepReport(Document):
     class Settings:
         name = "reports"
         indexes = [
+            # Per-user history: nickname == X, date >= Y, sorted by date
             IndexModel([("nickname", ASCENDING), ("date", ASCENDING)]),
+            # Per-day queries: serves the date in [start, end) filter; a sort by
+            # steps over that range is still done in memory by the server
+            IndexModel([("date", ASCENDING), ("steps", DESCENDING)]),
         ]
 
 
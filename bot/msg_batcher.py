@@ -0,0 +1,85 @@
+"""Micro-batcher for TelegramMessage writes.
+
+Messages arriving within a short window are collected and written with a
+single unordered ``bulk_write`` instead of one ``insert`` per message.
+"""
+
+import asyncio
+from typing import Optional
+
+import structlog
+from pymongo import InsertOne
+
+from bot.models import TelegramMessage
+
+logger = structlog.get_logger()
+
+_FLUSH_INTERVAL = 0.05  # seconds to wait for more messages after the first
+_MAX_BATCH = 100
+
+_queue: Optional[asyncio.Queue] = None
+_flusher: Optional[asyncio.Task] = None
+
+
+def start() -> None:
+    """Start the background flusher; call once from the bot's startup hook."""
+    global _queue, _flusher
+    if _flusher is not None:
+        return
+    _queue = asyncio.Queue()
+    _flusher = asyncio.create_task(_flush_loop())
+    logger.info("Message batcher started")
+
+
+def enqueue(doc: dict) -> None:
+    """Schedule a raw TelegramMessage document for insertion."""
+    if _queue is None:
+        logger.warning("Message batcher not started, dropping message")
+        return
+    _queue.put_nowait(doc)
+
+
+async def stop() -> None:
+    """Flush pending messages and stop the flusher."""
+    global _queue, _flusher
+    if _flusher is None:
+        return
+    _queue.put_nowait(None)  # sentinel: flush what's queued, then exit
+    await _flusher
+    _queue = None
+    _flusher = None
+    logger.info("Message batcher stopped")
+
+
+async def _flush_loop() -> None:
+    loop = asyncio.get_running_loop()
+    stopping = False
+    while not stopping:
+        doc = await _queue.get()
+        if doc is None:
+            break
+        batch = [doc]
+        deadline = loop.time() + _FLUSH_INTERVAL
+        while len(batch) < _MAX_BATCH:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                doc = await asyncio.wait_for(_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if doc is None:
+                stopping = True
+                break
+            batch.append(doc)
+        await _write(batch)
+
+
+async def _write(batch: list[dict]) -> None:
+    try:
+        await TelegramMessage.get_pymongo_collection().bulk_write(
+            [InsertOne(doc) for doc in batch], ordered=False
+        )
+    except Exception as exc:
+        logger.error("Failed to save messages to MongoDB",
+                     count=len(batch), error=str(exc))
@@ -1,11 +1,28 @@
 import re
+import time
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional
 
 # Matches d.m, d.m.yy, d.m.yyyy (and dd/mm variants).
 # Year group is optional; 2-digit years are treated as 20xx.
-_DATE_RE = re.compile(r"\b(\d{1,2})\.(\d{1,2})(?:\.(\d{2,4}))?\b")
+_DATE_RE = re.compile(r"\b(?P<day>\d{1,2})\.(?P<month>\d{1,2})(?:\.(?P<year>\d{2,4}))?\b")
+
+# One left-to-right scan yields typed tokens; alternatives are tried in order,
+# so digits inside a hashtag or a date never surface as a standalone number.
+_TOKEN_RE = re.compile(
+    r"(?P<tag>#\w+)"
+    rf"|(?P<date>{_DATE_RE.pattern})"
+    r"|(?P<num>\b\d+\b)"
+)
+
+# The report hashtag itself, casefolded; never taken as the nickname
+_REPORT_TAGS = frozenset(t.casefold() for t in ("отчет", "отчёт"))
+
+# Current year and the monotonic time it was read; refreshed at most once a
+# minute so year-less dates don't hit the clock on every message.
+_YEAR_TTL = 60.0
+_year_cache = [datetime.now().year, time.monotonic()]
 
 
 @dataclass
@@ -25,35 +42,55 @@ def parse_report(text: str) -> ReportData:
     - Date:     first occurrence of d.m, d.m.yy, d.m.yyyy (dd/mm variants too)
                 Missing year → current year; 2-digit year → 20xx
     - Steps:    first standalone integer after removing the date and all hashtags
+
+    Text without any '#' cannot be a report and returns an empty ReportData.
     """
     result = ReportData()
+    if "#" not in text:
+        return result
+    date_seen = False
+
+    pos = 0
+    while (m := _TOKEN_RE.search(text, pos)) is not None:
+        pos = m.end()
+        date_match = None
+        if m.group("tag") is not None:
+            tag = m.group("tag")[1:]
+            if result.nickname is None and tag.casefold() not in _REPORT_TAGS:
+                result.nickname = tag
+            # A date glued to the '#' ("#12.05") is both a tag and the date
+            date_match = _DATE_RE.match(text, m.start() + 1)
+            if date_match is not None:
+                pos = max(pos, date_match.end())
+        elif m.group("date") is not None:
+            date_match = m
+        elif result.steps is None:
+            result.steps = int(m.group("num"))
 
-    # --- nickname ---
-    for tag in re.findall(r"#(\w+)", text, re.IGNORECASE):
-        if tag.lower() not in ("отчет", "отчёт"):
-            result.nickname = tag
-            break
-
-    # --- date ---
-    date_match = _DATE_RE.search(text)
-    if date_match:
-        day, month, year_str = int(date_match.group(1)), int(date_match.group(2)), date_match.group(3)
-        if year_str is None:
-            year = datetime.now().year
-        elif len(year_str) == 2:
-            year = 2000 + int(year_str)
-        else:
-            year = int(year_str)
-        try:
-            result.date = datetime(year, month, day)
-        except ValueError:
-            pass
-
-    # --- steps: remove date + hashtags first so their digits don't interfere ---
-    cleaned = _DATE_RE.sub(" ", text)
-    cleaned = re.sub(r"#\w+", " ", cleaned, flags=re.IGNORECASE)
-    numbers = re.findall(r"\b(\d+)\b", cleaned)
-    if numbers:
-        result.steps = int(numbers[0])
+        # Only the first date counts; later ones are still skipped as steps
+        if date_match is not None and not date_seen:
+            date_seen = True
+            result.date = _parse_date(date_match)
 
     return result
+
+
+def _parse_date(m: re.Match) -> Optional[datetime]:
+    day, month, year_str = int(m.group("day")), int(m.group("month")), m.group("year")
+    if year_str is None:
+        year = _current_year()
+    elif len(year_str) == 2:
+        year = 2000 + int(year_str)
+    else:
+        year = int(year_str)
+    try:
+        return datetime(year, month, day)
+    except ValueError:
+        return None
+
+
+def _current_year() -> int:
+    now = time.monotonic()
+    if now - _year_cache[1] > _YEAR_TTL:
+        _year_cache[:] = [datetime.now().year, now]
+    return _year_cache[0]
@@ -1,11 +1,14 @@
 import calendar
+import threading
 import time
 from datetime import datetime
 from typing import Optional
 
 import gspread
+import orjson
 import structlog
 from google.oauth2.service_account import Credentials
+from gspread.http_client import HTTPClient
 
 from bot.decorators import retry
 
@@ -20,6 +23,28 @@ _MONTH_NAMES_RU = {
 }
 _MONTH_HEADER_SET = set(_MONTH_NAMES_RU.values())
 
+# The sheet is also edited by hand (new month sections, reordering), so the
+# in-memory snapshot is re-read at least this often, on any index miss and
+# whenever a cached position no longer matches the sheet.
+_SNAPSHOT_TTL = 600  # seconds
+
+
+class _OrjsonHTTPClient(HTTPClient):
+    """gspread HTTP client that encodes JSON bodies with orjson.
+
+    requests would otherwise run batch_update/batch_format payloads through
+    the stdlib encoder.
+    """
+
+    def request(self, method, endpoint, params=None, data=None, json=None,
+                files=None, headers=None):
+        if json is not None:
+            data = orjson.dumps(json)
+            headers = {**(headers or {}), "Content-Type": "application/json"}
+            json = None
+        return super().request(method, endpoint, params=params, data=data,
+                               json=json, files=files, headers=headers)
+
 
 class SheetsService:
     """Read/write helper for the step-tracking Google Spreadsheet.
@@ -36,6 +61,13 @@ class SheetsService:
     Each month section is pre-filled with all days of that month on creation.
     Medal places colour the cell background (gold/silver/bronze).
     Missing month sections and nickname rows are appended automatically.
+
+    The worksheet handle and a snapshot of its values are cached, with
+    ``{(MONTH, "dd.mm"): col}`` and ``{(MONTH, nickname_lower): row}`` indexes
+    built from it, so most writes skip the full-sheet read. Cached positions
+    are re-checked against the sheet with one small batch_get before writing.
+    Methods are called from worker threads via ``asyncio.to_thread`` and
+    serialise on a lock.
     """
 
     def __init__(
@@ -47,10 +79,18 @@ class SheetsService:
         creds = Credentials.from_service_account_file(
             credentials_path, scopes=_SCOPES
         )
-        self._client = gspread.authorize(creds)
+        self._client = gspread.authorize(creds, http_client=_OrjsonHTTPClient)
         self._spreadsheet_id = spreadsheet_id
         self._steps_worksheet = steps_worksheet
 
+        self._lock = threading.Lock()
+        self._sheet: Optional[gspread.Worksheet] = None
+        self._values: list[list[str]] = []
+        self._sections: dict[str, dict] = {}
+        self._col_index: dict[tuple[str, str], int] = {}
+        self._row_index: dict[tuple[str, str], int] = {}
+        self._loaded_at: Optional[float] = None
+
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
@@ -58,13 +98,23 @@ class SheetsService:
     @retry(attempts=4, initial_delay=5, backoff_factor=3, max_delay=30, jitter=False)
     def write_steps(self, nickname: str, date: datetime, steps: int) -> None:
         """Write *steps* into the steps sheet at (nickname, date)."""
-        sheet = self._get_sheet()
         nickname = self._normalise_nick(nickname)
 
-        all_values = sheet.get_all_values()
-        col_idx, row_idx = self._ensure_cell(sheet, all_values, nickname, date)
+        with self._lock:
+            try:
+                sheet = self._get_sheet()
+                fresh = self._load_verified(sheet, [(nickname, date)])
+                col_idx, row_idx, updates = self._ensure_cell(
+                    sheet, nickname, date, reload_on_miss=not fresh)
+
+                # Nickname cell (if new) and value cell go out in one values:batchUpdate
+                updates.append(self._cell_update(row_idx, col_idx, steps))
+                sheet.batch_update(updates, value_input_option="RAW")
+                self._set_local(row_idx, col_idx, steps)
+            except Exception:
+                self._loaded_at = None  # snapshot may be out of sync; re-read next time
+                raise
 
-        sheet.update_cell(row_idx + 1, col_idx + 1, steps)
         logger.info("Wrote steps to sheet", nickname=nickname,
                     date=date.strftime("%d.%m.%Y"), steps=steps)
 
@@ -78,47 +128,101 @@ class SheetsService:
     # AG (col 33) is totals; medals start at AH (col 34, 1-based).
     _MEDALS_START_COL = 34  # 1-based
 
-    @retry(attempts=4, initial_delay=5, backoff_factor=3, max_delay=30, jitter=False)
     def write_medal(self, nickname: str, date: datetime, symbol: str) -> None:
         """Write medal symbol into the first empty cell in the medals area (AH+).
 
         🥇 → gold, 🥈 → silver, 🥉 → bronze.
         The medal symbol is written into the cell and the background is coloured.
         """
-        color = self._MEDAL_COLORS.get(symbol)
-        if color is None:
-            logger.warning("Unknown medal symbol, skipping", symbol=symbol)
-            return
-
-        sheet = self._get_sheet()
-        nickname = self._normalise_nick(nickname)
-
-        all_values = sheet.get_all_values()
-        col_idx, row_idx = self._ensure_cell(sheet, all_values, nickname, date)
-
-        # Re-fetch the row so we see any changes made by _ensure_cell
-        all_values = sheet.get_all_values()
-        row = all_values[row_idx] if row_idx < len(all_values) else []
-
-        # Format the steps value cell with the medal colour
-        steps_cell_a1 = gspread.utils.rowcol_to_a1(row_idx + 1, col_idx + 1)
-        sheet.format(steps_cell_a1, {"backgroundColor": color})
+        self.write_medals_bulk([(nickname, date, symbol)])
 
-        # Find first empty cell starting at _MEDALS_START_COL (convert to 0-based)
-        medal_col_idx = self._MEDALS_START_COL - 1
-        while medal_col_idx < len(row) and row[medal_col_idx]:
-            medal_col_idx += 1
+    @retry(attempts=4, initial_delay=5, backoff_factor=3, max_delay=30, jitter=False)
+    def write_medals_bulk(self, entries: list[tuple[str, datetime, str]]) -> None:
+        """Write several (nickname, date, symbol) medals in one values and one format request.
 
-        cell_a1 = gspread.utils.rowcol_to_a1(row_idx + 1, medal_col_idx + 1)
-        sheet.update_cell(row_idx + 1, medal_col_idx + 1, symbol)
-        sheet.format(cell_a1, {"backgroundColor": color})
-        logger.info("Wrote medal cell", nickname=nickname, date=date.strftime(
-            "%d.%m.%Y"), symbol=symbol, cell=cell_a1, steps_cell=steps_cell_a1)
+        Each medal goes into the first empty cell of the medals area (AH+) of
+        its row, and both that cell and the steps cell are coloured.
+        """
+        data: list[dict] = []
+        formats: list[dict] = []
+        written: list[tuple[str, str, str]] = []
+
+        with self._lock:
+            try:
+                sheet = self._get_sheet()
+
+                medals: list[tuple[str, datetime, str, dict]] = []
+                for nickname, date, symbol in entries:
+                    color = self._MEDAL_COLORS.get(symbol)
+                    if color is None:
+                        logger.warning("Unknown medal symbol, skipping", symbol=symbol)
+                        continue
+                    medals.append((self._normalise_nick(nickname), date, symbol, color))
+
+                fresh = self._load_verified(sheet, [(n, d) for n, d, _, _ in medals])
+
+                # Re-read at most once up front: a reload between entries would
+                # drop rows appended locally but not yet written to the sheet.
+                if not fresh and any(
+                    (self._month_header(d), d.strftime("%d.%m")) not in self._col_index
+                    or (self._month_header(d), n.lower()) not in self._row_index
+                    for n, d, _, _ in medals
+                ):
+                    self._load_index(sheet, force=True)
+
+                # Pass 1: create missing rows. insert_rows shifts everything below,
+                # so cell addresses are only taken once all rows exist.
+                new_nicks: set[tuple[str, str]] = set()
+                for nickname, date, _, _ in medals:
+                    _, _, updates = self._ensure_cell(sheet, nickname, date, reload_on_miss=False)
+                    if updates:
+                        new_nicks.add((nickname, self._month_header(date)))
+
+                # Pass 2: resolve final positions and queue values and formats
+                for nickname, date, symbol, color in medals:
+                    month_header = self._month_header(date)
+                    col_idx = self._col_index[(month_header, date.strftime("%d.%m"))]
+                    row_idx = self._row_index[(month_header, nickname.lower())]
+                    if (nickname, month_header) in new_nicks:
+                        data.append(self._cell_update(row_idx, 0, nickname))
+                    row = self._values[row_idx]
+
+                    # Find first empty cell starting at _MEDALS_START_COL (convert to 0-based)
+                    medal_col_idx = self._MEDALS_START_COL - 1
+                    while medal_col_idx < len(row) and row[medal_col_idx]:
+                        medal_col_idx += 1
+
+                    data.append(self._cell_update(row_idx, medal_col_idx, symbol))
+                    # Mirror locally so a later entry on the same row picks the next cell
+                    self._set_local(row_idx, medal_col_idx, symbol)
+
+                    steps_cell_a1 = gspread.utils.rowcol_to_a1(row_idx + 1, col_idx + 1)
+                    cell_a1 = gspread.utils.rowcol_to_a1(row_idx + 1, medal_col_idx + 1)
+                    formats.append({"range": steps_cell_a1, "format": {"backgroundColor": color}})
+                    formats.append({"range": cell_a1, "format": {"backgroundColor": color}})
+                    written.append((nickname, date.strftime("%d.%m.%Y"), symbol))
+
+                if data:
+                    sheet.batch_update(data, value_input_option="RAW")
+                    sheet.batch_format(formats)
+            except Exception:
+                self._loaded_at = None  # snapshot may be out of sync; re-read next time
+                raise
+
+        logger.info("Wrote medal cells", medals=written)
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
+    @staticmethod
+    def _cell_update(row_idx: int, col_idx: int, value) -> dict:
+        """Build a batch_update entry for the 0-based cell (row_idx, col_idx)."""
+        return {
+            "range": gspread.utils.rowcol_to_a1(row_idx + 1, col_idx + 1),
+            "values": [[value]],
+        }
+
     @staticmethod
     def _normalise_nick(nickname: str) -> str:
         return f"#{nickname}" if not nickname.startswith("#") else nickname
@@ -161,65 +265,156 @@ class SheetsService:
                 i += 1
         return sections
 
+    def _load_index(self, sheet: gspread.Worksheet, force: bool = False) -> bool:
+        """Read the sheet into the local snapshot unless a fresh one is cached.
+
+        Returns True if the sheet was actually read.
+        """
+        if (
+            not force
+            and self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < _SNAPSHOT_TTL
+        ):
+            return False
+        self._values = sheet.get_all_values()
+        self._rebuild_index()
+        self._loaded_at = time.monotonic()
+        return True
+
+    def _load_verified(
+        self,
+        sheet: gspread.Worksheet,
+        cells: list[tuple[str, datetime]],
+    ) -> bool:
+        """Load the snapshot, re-reading it if a cached position no longer matches.
+
+        Rows may have been inserted or reordered by hand since the snapshot was
+        taken, so before reusing it the nickname cell (column A) and date header
+        cell of every cached (nickname, date) are fetched in one batch_get.
+        Returns True if the snapshot was read from the sheet by this call.
+        """
+        if self._load_index(sheet):
+            return True
+
+        expected: dict[str, str] = {}  # A1 → expected value (nicknames lowercased)
+        for nickname, date in cells:
+            month_header = self._month_header(date)
+            date_col_str = date.strftime("%d.%m")
+            col_idx = self._col_index.get((month_header, date_col_str))
+            row_idx = self._row_index.get((month_header, nickname.lower()))
+            if col_idx is not None:
+                dates_row = self._sections[month_header]["dates_row"]
+                expected[gspread.utils.rowcol_to_a1(dates_row + 1, col_idx + 1)] = date_col_str
+            if row_idx is not None:
+                expected[gspread.utils.rowcol_to_a1(row_idx + 1, 1)] = nickname.lower()
+        if not expected:
+            return False  # nothing cached to rely on; misses reload in _ensure_cell
+
+        ranges = list(expected)
+        for a1, value_range in zip(ranges, sheet.batch_get(ranges)):
+            actual = value_range[0][0] if value_range and value_range[0] else ""
+            if actual.strip().lower() != expected[a1]:
+                logger.info("Sheet changed since snapshot, reloading",
+                            cell=a1, expected=expected[a1], actual=actual)
+                self._load_index(sheet, force=True)
+                return True
+        return False
+
+    def _rebuild_index(self) -> None:
+        """Recompute section and (month, date)/(month, nickname) indexes from the snapshot."""
+        self._sections = {}
+        self._col_index = {}
+        self._row_index = {}
+        for section in self._parse_sections(self._values):
+            month = section["month_header"].upper()
+            if month in self._sections:
+                continue  # first section for a month wins
+            self._sections[month] = section
+
+            dates_row = self._values[section["dates_row"]
+                                     ] if section["dates_row"] < len(self._values) else []
+            # Column 0 is the "Ник" header
+            for i, cell in enumerate(dates_row[1:], start=1):
+                self._col_index.setdefault((month, cell), i)
+
+            for i in range(section["data_start"], section["data_end"]):
+                row = self._values[i]
+                if row and row[0]:
+                    self._row_index.setdefault((month, row[0].lower()), i)
+
+    def _shift_index(self, inserted_at: int) -> None:
+        """Move every indexed row at or below ``inserted_at`` down by one."""
+        for section in self._sections.values():
+            if section["header_row"] >= inserted_at:
+                for key in ("header_row", "dates_row", "data_start", "data_end"):
+                    section[key] += 1
+        for key, row_idx in self._row_index.items():
+            if row_idx >= inserted_at:
+                self._row_index[key] = row_idx + 1
+
+    def _set_local(self, row_idx: int, col_idx: int, value) -> None:
+        """Mirror a cell write into the local snapshot."""
+        while len(self._values) <= row_idx:
+            self._values.append([])
+        row = self._values[row_idx]
+        while len(row) <= col_idx:
+            row.append("")
+        row[col_idx] = str(value)
+
     def _ensure_cell(
         self,
         sheet: gspread.Worksheet,
-        all_values: list[list[str]],
         nickname: str,
         date: datetime,
-    ) -> tuple[int, int]:
-        """Return (col_idx, row_idx) for (nickname, date), creating them if needed.
-
-        Both indices are 0-based; add 1 when calling sheet.update_cell().
+        reload_on_miss: bool = True,
+    ) -> tuple[int, int, list[dict]]:
+        """Return (col_idx, row_idx, updates) for (nickname, date).
+
+        Both indices are 0-based. When the nickname row has to be created,
+        ``updates`` holds the pending nickname cell write so the caller can
+        send it in the same batch_update as its own value (rows inserted
+        above a following section are written by insert_rows itself).
         """
         month_header = self._month_header(date)
         date_col_str = date.strftime("%d.%m")
+        col_key = (month_header, date_col_str)
+        row_key = (month_header, nickname.lower())
 
-        # Find the month section
-        sections = self._parse_sections(all_values)
-        section = next(
-            (s for s in sections if s["month_header"].upper() == month_header), None)
+        # On any miss, re-read once in case the sheet was edited by hand
+        if reload_on_miss and (
+            col_key not in self._col_index or row_key not in self._row_index
+        ):
+            self._load_index(sheet, force=True)
 
-        if section is None:
+        if month_header not in self._sections:
             raise ValueError(
                 f"Month section for {month_header} not found"
             )
 
-        # Find date column in the pre-filled dates row
-        dates_row = all_values[section["dates_row"]
-                               ] if section["dates_row"] < len(all_values) else []
-        col_idx: Optional[int] = None
-        for i, cell in enumerate(dates_row):
-            if i == 0:
-                continue  # skip "Ник" column
-            if cell == date_col_str:
-                col_idx = i
-                break
-
+        col_idx = self._col_index.get(col_key)
         if col_idx is None:
             raise ValueError(
                 f"Date {date_col_str} not found in pre-filled section for {month_header}"
             )
 
-        # Find or create nickname row within the section
-        row_idx: Optional[int] = None
-        for i in range(section["data_start"], section["data_end"]):
-            row = all_values[i] if i < len(all_values) else []
-            if row and row[0].lower() == nickname.lower():
-                row_idx = i
-                break
-
+        updates: list[dict] = []
+        row_idx = self._row_index.get(row_key)
         if row_idx is None:
-            row_idx = section["data_end"]
-            if row_idx < len(all_values):
+            row_idx = self._sections[month_header]["data_end"]
+            if row_idx < len(self._values):
                 # Another section follows — insert a row to avoid overwriting it
                 sheet.insert_rows([[nickname]], row=row_idx + 1)
+                self._values.insert(row_idx, [nickname])
+                self._shift_index(row_idx)
             else:
-                sheet.update_cell(row_idx + 1, 1, nickname)
+                updates.append(self._cell_update(row_idx, 0, nickname))
+                self._set_local(row_idx, 0, nickname)
+            self._sections[month_header]["data_end"] += 1
+            self._row_index[row_key] = row_idx
             logger.info("Created new nickname row",
                         nickname=nickname, row=row_idx + 1)
 
-        return col_idx, row_idx
+        return col_idx, row_idx, updates
 
     @retry(attempts=4, initial_delay=5, backoff_factor=3, max_delay=30, jitter=False)
     def _batch_update(self, sheet: gspread.Worksheet, updates: list[dict]) -> None:
@@ -230,10 +425,14 @@ class SheetsService:
         sheet.format(cell_a1, fmt)
 
     def _get_sheet(self) -> gspread.Worksheet:
+        if self._sheet is not None:
+            return self._sheet
         spreadsheet = self._client.open_by_key(self._spreadsheet_id)
         try:
-            return spreadsheet.worksheet(self._steps_worksheet)
+            self._sheet = spreadsheet.worksheet(self._steps_worksheet)
         except gspread.WorksheetNotFound:
             logger.info("Worksheet not found, creating it",
                         name=self._steps_worksheet)
-            return spreadsheet.add_worksheet(title=self._steps_worksheet, rows=200, cols=50)
+            self._sheet = spreadsheet.add_worksheet(
+                title=self._steps_worksheet, rows=200, cols=50)
+        return self._sheet
@@ -1,8 +1,11 @@
 """Utility to read version from pyproject.toml"""
+import re
 import tomllib
 from pathlib import Path
 from functools import lru_cache
 
+_VERSION_RE = re.compile(r'^version\s*=\s*"([^"]+)"')
+
 
 @lru_cache(maxsize=1)
 def get_version() -> str:
@@ -16,8 +19,28 @@ def get_version() -> str:
         project_root = Path(__file__).parent.parent.parent
         pyproject_path = project_root / "pyproject.toml"
 
+        version = _scan_version(pyproject_path)
+        if version is not None:
+            return version
+
+        # Unusual layout (inline tables, multi-line strings) — parse fully
         with open(pyproject_path, "rb") as f:
             data = tomllib.load(f)
             return data.get("project", {}).get("version", "unknown")
     except Exception:
         return "unknown"
+
+
+def _scan_version(pyproject_path: Path) -> str | None:
+    """Find ``version = "..."`` in the [project] table without parsing the TOML."""
+    in_project = False
+    with open(pyproject_path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                if in_project:
+                    return None
+                in_project = line == "[project]"
+            elif in_project and (m := _VERSION_RE.match(line)):
+                return m.group(1)
+    return None
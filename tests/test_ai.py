@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("openai")
+
+from bot.ai import _fast_classify  # noqa: E402
+
+
+def test_greetings_only_needs_no_context():
+    assert _fast_classify("Привет, спасибо!") == {"contexts": ["none"], "nickname": None}
+
+
+def test_single_nick_routes_to_user_steps():
+    assert _fast_classify("сколько шагов у #Vasya?") == {
+        "contexts": ["user_steps"], "nickname": "vasya"}
+
+
+def test_medal_question_falls_through():
+    assert _fast_classify("сколько медалей у #vasya?") is None
+
+
+def test_two_nicks_fall_through():
+    assert _fast_classify("кто больше прошел, #vasya или #petya?") is None
+
+
+def test_everyone_steps_routes_to_all_steps():
+    assert _fast_classify("сколько шагов прошли все сегодня?") == {
+        "contexts": ["all_steps"], "nickname": None}
+
+
+def test_unclear_question_falls_through():
+    assert _fast_classify("как дела?") is None
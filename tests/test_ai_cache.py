@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from bot import ai_cache
+from bot.ai_cache import TTLCache
+
+
+@pytest.fixture
+def clock(monkeypatch) -> list[float]:
+    """Controllable monotonic clock for the cache module."""
+    now = [1000.0]
+    monkeypatch.setattr(ai_cache.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_hit_before_expiry(clock):
+    async def run():
+        cache = TTLCache(maxsize=4, ttl=60)
+        await cache.set("k", "v")
+        clock[0] += 59
+        return await cache.get("k")
+
+    assert asyncio.run(run()) == "v"
+
+
+def test_miss_after_expiry(clock):
+    async def run():
+        cache = TTLCache(maxsize=4, ttl=60)
+        await cache.set("k", "v")
+        clock[0] += 60
+        return await cache.get("k"), cache
+
+    value, cache = asyncio.run(run())
+    assert value is None
+    assert "k" not in cache._data  # expired entry is dropped on read
+
+
+def test_lru_eviction_at_maxsize(clock):
+    async def run():
+        cache = TTLCache(maxsize=2, ttl=60)
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")       # "b" is now least recently used
+        await cache.set("c", 3)
+        return [await cache.get(k) for k in ("a", "b", "c")]
+
+    assert asyncio.run(run()) == [1, None, 3]
+
+
+def test_hit_and_miss_counters(clock):
+    async def run():
+        cache = TTLCache(maxsize=4, ttl=60)
+        await cache.get("k")       # miss: absent
+        await cache.set("k", "v")
+        await cache.get("k")       # hit
+        await cache.get("k")       # hit
+        clock[0] += 61
+        await cache.get("k")       # miss: expired
+        return cache.stats
+
+    assert asyncio.run(run()) == {"hits": 2, "misses": 2}
@@ -91,6 +91,18 @@ def test_steps_no_date():
     assert r.steps == 7500
 
 
+def test_steps_not_confused_by_hashtag_digits():
+    r = parse_report("#отчет #runner42 1.5.2024 9000")
+    assert r.nickname == "runner42"
+    assert r.steps == 9000
+
+
+def test_steps_skip_second_date():
+    r = parse_report("#отчет #alice 1.5.2024 2.5.2024 9000")
+    assert r.date == datetime(2024, 5, 1)
+    assert r.steps == 9000
+
+
 def test_steps_large_number():
     r = parse_report("#отчет #alice 1.5.2024 25000")
     assert r.steps == 25000
@@ -123,3 +135,10 @@ def test_empty_report_tag_only():
     assert r.nickname is None
     assert r.date is None
     assert r.steps is None
+
+
+def test_no_hashtag_not_parsed():
+    r = parse_report("1.5.2024 8000")
+    assert r.nickname is None
+    assert r.date is None
+    assert r.steps is None
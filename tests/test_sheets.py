@@ -0,0 +1,176 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("gspread")
+
+import gspread  # noqa: E402
+
+from bot import sheets  # noqa: E402
+from bot.sheets import SheetsService  # noqa: E402
+
+
+class FakeWorksheet:
+    """In-memory stand-in for gspread.Worksheet that applies and records calls."""
+
+    def __init__(self, values: list[list[str]]) -> None:
+        self.values = [list(row) for row in values]
+        self.calls: list[tuple] = []
+
+    def cell(self, a1: str) -> str:
+        row, col = gspread.utils.a1_to_rowcol(a1)
+        if row > len(self.values) or col > len(self.values[row - 1]):
+            return ""
+        return self.values[row - 1][col - 1]
+
+    def get_all_values(self) -> list[list[str]]:
+        self.calls.append(("get_all_values",))
+        return [list(row) for row in self.values]
+
+    def batch_get(self, ranges: list[str]) -> list[list[list[str]]]:
+        self.calls.append(("batch_get", list(ranges)))
+        return [[[v]] if (v := self.cell(a1)) else [] for a1 in ranges]
+
+    def insert_rows(self, rows: list[list[str]], row: int) -> None:
+        self.calls.append(("insert_rows", row))
+        for offset, values in enumerate(rows):
+            self.values.insert(row - 1 + offset, list(values))
+
+    def batch_update(self, data: list[dict], value_input_option=None) -> None:
+        self.calls.append(("batch_update", [d["range"] for d in data]))
+        for d in data:
+            row, col = gspread.utils.a1_to_rowcol(d["range"])
+            while len(self.values) < row:
+                self.values.append([])
+            cells = self.values[row - 1]
+            while len(cells) < col:
+                cells.append("")
+            cells[col - 1] = str(d["values"][0][0])
+
+    def batch_format(self, formats: list[dict]) -> None:
+        self.calls.append(("batch_format", [f["range"] for f in formats]))
+
+    def count(self, name: str) -> int:
+        return sum(1 for call in self.calls if call[0] == name)
+
+
+SHEET = [
+    ["МАРТ"],
+    ["Ник", "01.03", "02.03"],
+    ["#vasya", "100"],
+    ["#masha"],
+    ["АПРЕЛЬ"],
+    ["Ник", "01.04", "02.04"],
+    ["#petya"],
+]
+
+
+@pytest.fixture
+def ws() -> FakeWorksheet:
+    return FakeWorksheet(SHEET)
+
+
+@pytest.fixture
+def svc(monkeypatch, ws) -> SheetsService:
+    monkeypatch.setattr(sheets.Credentials, "from_service_account_file",
+                        lambda *a, **kw: None)
+    monkeypatch.setattr(sheets.gspread, "authorize", lambda *a, **kw: None)
+    service = SheetsService("credentials.json", "sheet-id")
+    service._sheet = ws
+    return service
+
+
+# ---------------------------------------------------------------------------
+# Snapshot reuse
+# ---------------------------------------------------------------------------
+
+def test_write_steps_reuses_snapshot(svc, ws):
+    svc.write_steps("vasya", datetime(2026, 3, 1), 8000)
+    svc.write_steps("masha", datetime(2026, 3, 2), 9000)
+    assert ws.count("get_all_values") == 1
+    assert ws.cell("B3") == "8000"
+    assert ws.cell("C4") == "9000"
+
+
+def test_write_steps_reloads_when_row_moved_by_hand(svc, ws):
+    svc.write_steps("vasya", datetime(2026, 3, 1), 8000)
+    # Someone inserts a row above #vasya in the sheet UI
+    ws.values.insert(2, ["#kolya", "500"])
+
+    svc.write_steps("vasya", datetime(2026, 3, 2), 7000)
+
+    assert ws.count("get_all_values") == 2
+    assert ws.cell("C4") == "7000"   # #vasya's row after the insert
+    assert ws.cell("C3") == ""       # #kolya untouched
+
+
+# ---------------------------------------------------------------------------
+# Creating nickname rows
+# ---------------------------------------------------------------------------
+
+def _assert_index_consistent(svc: SheetsService) -> None:
+    """The in-place index updates must match a full rebuild of the snapshot."""
+    patched = (svc._row_index, svc._col_index, svc._sections)
+    svc._rebuild_index()
+    assert patched == (svc._row_index, svc._col_index, svc._sections)
+
+
+def test_new_nick_in_middle_section_shifts_following_rows(svc, ws):
+    svc.write_steps("newbie", datetime(2026, 3, 1), 5000)
+
+    assert ("insert_rows", 5) in ws.calls
+    assert ws.values[4][:2] == ["#newbie", "5000"]
+    assert ws.values[5] == ["АПРЕЛЬ"]
+    _assert_index_consistent(svc)
+
+    # Rows below the insert are found at their new positions without a re-read
+    svc.write_steps("petya", datetime(2026, 4, 2), 6000)
+    svc.write_steps("masha", datetime(2026, 3, 2), 7000)
+    assert ws.count("get_all_values") == 1
+    assert ws.cell("C8") == "6000"
+    assert ws.cell("C4") == "7000"
+
+
+def test_new_nick_in_last_section_is_written_in_same_batch(svc, ws):
+    svc.write_steps("newbie", datetime(2026, 4, 1), 5000)
+
+    assert ws.count("insert_rows") == 0
+    assert ("batch_update", ["A8", "B8"]) in ws.calls
+    assert ws.values[7][:2] == ["#newbie", "5000"]
+    _assert_index_consistent(svc)
+
+
+# ---------------------------------------------------------------------------
+# Medals
+# ---------------------------------------------------------------------------
+
+def test_bulk_medals_for_new_winners(svc, ws):
+    svc.write_medals_bulk([
+        ("zz1", datetime(2026, 3, 1), "🥇"),
+        ("zz2", datetime(2026, 3, 1), "🥈"),
+        ("yy", datetime(2026, 4, 1), "🥉"),
+    ])
+
+    # Both March rows are inserted before any address is taken
+    assert [c for c in ws.calls if c[0] == "insert_rows"] == [
+        ("insert_rows", 5), ("insert_rows", 6)]
+    assert ws.count("get_all_values") == 1
+    assert ws.count("batch_update") == 1
+    assert ws.count("batch_format") == 1
+    assert ws.values[4][0] == "#zz1" and ws.cell("AH5") == "🥇"
+    assert ws.values[5][0] == "#zz2" and ws.cell("AH6") == "🥈"
+    # Appended to the last section: nickname cell goes into the same batch
+    assert ws.values[9][0] == "#yy" and ws.cell("AH10") == "🥉"
+    assert ws.cell("A9") == "#petya"
+    _assert_index_consistent(svc)
+
+
+def test_medal_goes_to_first_free_cell(svc, ws):
+    ws.values[2] += [""] * (33 - len(ws.values[2])) + ["🥇", "🥈"]
+
+    svc.write_medals_bulk([("vasya", datetime(2026, 3, 1), "🥉")])
+
+    assert ws.cell("AJ3") == "🥉"
+    assert ws.cell("AH3") == "🥇" and ws.cell("AI3") == "🥈"
+    formats = [c for c in ws.calls if c[0] == "batch_format"]
+    assert formats == [("batch_format", ["B3", "AJ3"])]